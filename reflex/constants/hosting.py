@@ -9,6 +9,8 @@ class Hosting:
 
     # The hosting config json file
     HOSTING_JSON = os.path.join(Reflex.DIR, "hosting_v0.json")
+    # The file remembering the last token confirmed valid, shared across CLI invocations
+    TOKEN_CACHE_JSON = os.path.join(Reflex.DIR, "hosting_token_cache.json")
     # The hosting service backend URL
     CP_BACKEND_URL = "https://rxcp-dev-control-plane.fly.dev"
     # The hosting service webpage URL
@@ -33,6 +35,15 @@ class Hosting:
     WEB_AUTH_RETRIES = 60
     # The time to sleep between requests to check if for authentication completion. In seconds.
     WEB_AUTH_SLEEP_DURATION = 5
+    # The first wait before retrying an authentication request. In seconds.
+    # The wait grows by WEB_AUTH_BACKOFF_FACTOR up to WEB_AUTH_SLEEP_DURATION.
+    WEB_AUTH_INITIAL_SLEEP_DURATION = 0.5
+    # The factor to grow the wait by after each failed authentication request.
+    WEB_AUTH_BACKOFF_FACTOR = 1.5
+    # The maximum random time added to each wait, so clients do not retry in lockstep. In seconds.
+    WEB_AUTH_BACKOFF_JITTER = 0.25
+    # How long to wait for the browser to report if it opened, before assuming it did. In seconds.
+    BROWSER_OPEN_TIMEOUT = 2
     # The expected number of milestones
     MILESTONES_COUNT = 6
     # Expected server response time to new deployment request. In seconds.
@@ -42,8 +53,19 @@ class Hosting:
     # The time to wait for the frontend to come up after user initiates deployment. In seconds.
     FRONTEND_POLL_RETRIES = 30
     # End of deployment workflow message. Used to determine if it is the last message from server.
+    # These are phrases matched anywhere in a message, case insensitive.
     END_OF_DEPLOYMENT_MESSAGES = ["deploy success", "deploy failed"]
     # How many iterations to try and print the deployment event messages from server during deployment.
     DEPLOYMENT_EVENT_MESSAGES_RETRIES = 30
+    # The maximum number of streamed log lines to buffer before writing them out.
+    LOG_FLUSH_LINES = 32
+    # How long to wait for more streamed log lines before writing out the buffered ones. In seconds.
+    LOG_FLUSH_INTERVAL = 0.05
+    # How long a token confirmed valid by the server is trusted without validating again. In seconds.
+    TOKEN_VALIDATION_TTL = 300
     # Timeout limit for http requests
     HTTP_REQUEST_TIMEOUT = 5  # seconds
+    # The maximum number of connections the http client keeps open at once
+    HTTP_MAX_CONNECTIONS = 1000
+    # The maximum number of idle connections the http client keeps alive for reuse
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 100
@@ -614,7 +614,7 @@ def deploy(
 
     console.print("Waiting for server to report progress ...")
     # Display the key events such as build, deploy, etc
-    asyncio.get_event_loop().run_until_complete(
+    asyncio.run(
         hosting.display_deploy_milestones(key, from_iso_timestamp=deploy_requested_at)
     )
 
@@ -747,7 +747,7 @@ def get_deployment_logs(
     console.set_log_level(loglevel)
     console.print("Note: there is a few seconds delay for logs to be available.")
     try:
-        asyncio.get_event_loop().run_until_complete(hosting.get_logs(key))
+        asyncio.run(hosting.get_logs(key))
     except Exception as ex:
         console.error(f"Unable to get deployment logs due to: {ex}")
         raise typer.Exit(1) from ex
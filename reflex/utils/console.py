@@ -27,6 +27,17 @@ def set_log_level(log_level: LogLevel):
     _LOG_LEVEL = log_level
 
 
+def is_debug() -> bool:
+    """Check if debug messages are printed at the current log level.
+
+    Use this to skip building expensive debug messages that would not be printed.
+
+    Returns:
+        True if debug messages are printed.
+    """
+    return _LOG_LEVEL <= LogLevel.DEBUG
+
+
 def print(msg: str, **kwargs):
     """Print a message.
 
@@ -44,7 +55,7 @@ def debug(msg: str, **kwargs):
         msg: The debug message.
         kwargs: Keyword arguments to pass to the print function.
     """
-    if _LOG_LEVEL <= LogLevel.DEBUG:
+    if is_debug():
         print(f"[blue]Debug: {msg}[/blue]", **kwargs)
 
 
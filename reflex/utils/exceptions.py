@@ -13,3 +13,7 @@ class ImmutableStateError(AttributeError):
 
 class LockExpiredError(Exception):
     """Raised when the state lock expires while an event is being processed."""
+
+
+class NotAuthenticatedError(Exception):
+    """Raised when the hosting service rejects the access token."""
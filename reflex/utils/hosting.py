@@ -1,25 +1,285 @@
 """Hosting service related utilities."""
 from __future__ import annotations
 
+import asyncio
+import atexit
+import base64
 import contextlib
 import enum
+import functools
+import hashlib
+import itertools
 import json
 import os
+import random
 import re
+import sys
+import threading
 import time
 import uuid
 import webbrowser
-from datetime import datetime
+from datetime import datetime, timezone
 from http import HTTPStatus
-from typing import List, Optional
+from typing import Any, Generator, List, Optional
+from urllib.parse import urlencode
 
 import httpx
 import websockets
-from pydantic import Field, ValidationError, root_validator
+from pydantic import Field, ValidationError, root_validator, validator
+from websockets.exceptions import InvalidStatusCode
 
 from reflex import constants
 from reflex.base import Base
 from reflex.utils import console
+from reflex.utils.exceptions import NotAuthenticatedError
+
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> str:
+        """Serialize an object to a json string with orjson.
+
+        Args:
+            obj: The object to serialize.
+
+        Returns:
+            The json string.
+        """
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# Valid deployment keys consist of ASCII letters, digits and hyphens.
+_DEPLOYMENT_KEY_PATTERN = re.compile(r"[a-zA-Z0-9-]+", re.ASCII)
+
+# Valid env names start with a letter or underscore, followed by letters, digits or underscores.
+_ENV_NAME_PATTERN = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*", re.ASCII)
+
+# Matches any of the messages marking the end of the deployment workflow.
+_END_OF_DEPLOYMENT_PATTERN = re.compile(
+    "|".join(map(re.escape, constants.Hosting.END_OF_DEPLOYMENT_MESSAGES)),
+    re.IGNORECASE,
+)
+
+# The hosting config loaded from constants.Hosting.HOSTING_JSON, read once per process.
+_hosting_config: dict[str, str] | None = None
+# Guards reading and writing the hosting config.
+_hosting_config_lock = threading.Lock()
+
+# The sha256 hash of the last token confirmed valid by the control plane and
+# the epoch time until which it is trusted without validating again.
+_validated_token: tuple[str, float] | None = None
+
+
+@functools.lru_cache(maxsize=4)
+def _token_hash(token: str) -> str:
+    """Hash the token, so the token cache does not keep a copy of it.
+
+    Args:
+        token: The access token.
+
+    Returns:
+        The hex digest of the token.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_expiry(token: str) -> float | None:
+    """Read the expiry time of a JWT token without verifying it.
+
+    Args:
+        token: The access token.
+
+    Returns:
+        The epoch time the token expires at, None if the token has no readable expiry.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = _json_loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except Exception:
+        return None
+
+
+def _remember_validated_token(token: str):
+    """Trust the token the server confirmed valid for constants.Hosting.TOKEN_VALIDATION_TTL seconds.
+
+    The token is remembered in the token cache file too, so the next CLI
+    invocations do not validate it again.
+
+    Args:
+        token: The access token confirmed valid.
+    """
+    global _validated_token
+    valid_until = time.time() + constants.Hosting.TOKEN_VALIDATION_TTL
+    if (expiry := _token_expiry(token)) is not None:
+        valid_until = min(valid_until, expiry)
+    _validated_token = (_token_hash(token), valid_until)
+    try:
+        tmp_path = f"{constants.Hosting.TOKEN_CACHE_JSON}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump(
+                {"token_hash": _validated_token[0], "valid_until": valid_until},
+                cache_file,
+            )
+        os.replace(tmp_path, constants.Hosting.TOKEN_CACHE_JSON)
+    except Exception as ex:
+        # Best efforts, the token is validated again in the next invocation
+        console.debug(f"Unable to save the token cache due to: {ex}")
+
+
+def _token_validated_recently(token: str) -> bool:
+    """Check if the server confirmed the token valid recently.
+
+    Args:
+        token: The access token.
+
+    Returns:
+        True if the token can be trusted without validating it again, False otherwise.
+    """
+    global _validated_token
+    try:
+        if _validated_token is None:
+            with open(constants.Hosting.TOKEN_CACHE_JSON, "r") as cache_file:
+                token_cache = json.load(cache_file)
+            validated_hash = token_cache["token_hash"]
+            valid_until = token_cache["valid_until"]
+            if not isinstance(validated_hash, str) or not isinstance(
+                valid_until, (int, float)
+            ):
+                console.debug(f"Ignoring the unexpected token cache {token_cache}")
+                return False
+            _validated_token = (validated_hash, float(valid_until))
+        validated_hash, valid_until = _validated_token
+        return validated_hash == _token_hash(token) and time.time() < valid_until
+    except Exception as ex:
+        # A missing or broken cache only means the token is validated again
+        console.debug(f"Unable to use the token cache due to: {ex}")
+        return False
+
+
+def invalidate_token_cache():
+    """Forget the token last confirmed valid, so the next use validates it again."""
+    global _validated_token
+    _validated_token = None
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(constants.Hosting.TOKEN_CACHE_JSON)
+
+
+def _http_client_settings() -> dict:
+    """Get the settings shared by the sync and async HTTP clients.
+
+    Returns:
+        The keyword arguments to construct an httpx client with.
+    """
+    return dict(
+        # Acquiring a connection from the pool is bound by the same timeout,
+        # so concurrent requests do not stall waiting for a free connection.
+        timeout=httpx.Timeout(
+            constants.Hosting.HTTP_REQUEST_TIMEOUT,
+            pool=constants.Hosting.HTTP_REQUEST_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=constants.Hosting.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=constants.Hosting.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Get the HTTP client shared by all the requests to the hosting service.
+
+    The client keeps connections alive in its pool, so consecutive requests
+    to the control plane reuse the established TCP/TLS connection.
+
+    Returns:
+        The shared HTTP client.
+    """
+    client = httpx.Client(**_http_client_settings())
+    atexit.register(client.close)
+    return client
+
+
+@contextlib.contextmanager
+def _hosting_errors(
+    action: str,
+    request_error: str = "request error",
+    timeout_error: str | None = None,
+    http_error: str | None = "internal errors",
+):
+    """Translate the errors from a request to the hosting service into exceptions for the user.
+
+    Args:
+        action: What the request does, used in debug messages.
+        request_error: The message if the request could not be sent or timed out.
+        timeout_error: The message if the request timed out, None to use request_error.
+        http_error: The message if the server responded with an error status,
+                    None to use the error from the server.
+
+    Yields:
+        Nothing, the errors raised in the block are translated.
+
+    Raises:
+        NotAuthenticatedError: If the server rejects the access token.
+        Exception: If the request fails. The exception message is the reason.
+    """
+    try:
+        yield
+    except NotAuthenticatedError:
+        raise
+    except httpx.TimeoutException as te:
+        console.debug(f"Unable to {action} due to request timeout: {te}")
+        raise Exception(timeout_error or request_error) from te
+    except httpx.RequestError as re:
+        console.debug(f"Unable to {action} due to request error: {re}")
+        raise Exception(request_error) from re
+    except httpx.HTTPError as he:
+        console.debug(f"Unable to {action} due to {he}.")
+        raise Exception(http_error or f"{he}") from he
+    except (json.JSONDecodeError, KeyError, ValidationError) as jkve:
+        console.debug(f"Server response format unexpected: {jkve}")
+        raise Exception("internal errors") from jkve
+    except Exception as ex:
+        console.debug(f"Unable to {action} due to unexpected error: {ex}.")
+        raise Exception("internal errors") from ex
+
+
+def _read_hosting_config() -> dict[str, str]:
+    """Read the hosting config, loading it from the config file on first use.
+
+    Returns:
+        A copy of the hosting config.
+    """
+    global _hosting_config
+    with _hosting_config_lock:
+        if _hosting_config is None:
+            with open(constants.Hosting.HOSTING_JSON, "r") as config_file:
+                _hosting_config = json.load(config_file)
+        return dict(_hosting_config)  # type: ignore
+
+
+def _write_hosting_config(hosting_config: dict[str, str]):
+    """Write the hosting config to the config file.
+
+    The config is written to a temporary file first and then moved in place,
+    so the config file is never left partially written.
+
+    Args:
+        hosting_config: The hosting config to write.
+    """
+    global _hosting_config
+    with _hosting_config_lock:
+        tmp_path = f"{constants.Hosting.HOSTING_JSON}.tmp"
+        with open(tmp_path, "w") as config_file:
+            json.dump(hosting_config, config_file)
+        os.replace(tmp_path, constants.Hosting.HOSTING_JSON)
+        _hosting_config = dict(hosting_config)
 
 
 def get_existing_access_token() -> tuple[str, str]:
@@ -33,9 +293,7 @@ def get_existing_access_token() -> tuple[str, str]:
     """
     console.debug("Fetching token from existing config...")
     try:
-        with open(constants.Hosting.HOSTING_JSON, "r") as config_file:
-            hosting_config = json.load(config_file)
-
+        hosting_config = _read_hosting_config()
         assert (
             access_token := hosting_config.get("access_token", "")
         ), "no access token found or empty token"
@@ -55,45 +313,31 @@ def validate_token(token: str):
 
     Raises:
         ValueError: if access denied.
-        Exception: if runs into timeout, failed requests, unexpected errors. These should be tried again.
     """
-    try:
-        response = httpx.post(
+    with _hosting_errors("validate the token", http_error="server error"):
+        response = get_http_client().post(
             constants.Hosting.POST_VALIDATE_ME_ENDPOINT,
             headers=authorization_header(token),
-            timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT,
         )
-        if response.status_code == HTTPStatus.FORBIDDEN:
-            raise ValueError
-        response.raise_for_status()
-    except httpx.RequestError as re:
-        console.debug(f"Request to auth server failed due to {re}")
-        raise Exception("request error") from re
-    except httpx.HTTPError as ex:
-        console.debug(f"Unable to validate the token due to: {ex}")
-        raise Exception("server error") from ex
-    except ValueError as ve:
-        console.debug(f"Access denied for {token}")
-        raise ValueError("access denied") from ve
-    except Exception as ex:
-        console.debug(f"Unexpected error: {ex}")
-        raise Exception("internal errors") from ex
+        if response.status_code != HTTPStatus.FORBIDDEN:
+            response.raise_for_status()
+            return
+    console.debug(f"Access denied for {token}")
+    raise ValueError("access denied")
 
 
 def delete_token_from_config():
     """Delete the invalid token from the config file if applicable."""
-    if os.path.exists(constants.Hosting.HOSTING_JSON):
-        hosting_config = {}
-        try:
-            with open(constants.Hosting.HOSTING_JSON, "w") as config_file:
-                hosting_config = json.load(config_file)
-                del hosting_config["access_token"]
-                json.dump(hosting_config, config_file)
-        except Exception as ex:
-            # Best efforts removing invalid token is OK
-            console.debug(
-                f"Unable to delete the invalid token from config file, err: {ex}"
-            )
+    invalidate_token_cache()
+    try:
+        hosting_config = _read_hosting_config()
+        if hosting_config.pop("access_token", None) is not None:
+            _write_hosting_config(hosting_config)
+    except FileNotFoundError:
+        console.debug("No config file found, there is no token to delete")
+    except Exception as ex:
+        # Best efforts removing invalid token is OK
+        console.debug(f"Unable to delete the invalid token from config file, err: {ex}")
 
 
 def save_token_to_config(token: str, code: str | None = None):
@@ -110,17 +354,23 @@ def save_token_to_config(token: str, code: str | None = None):
     if code:
         hosting_config["code"] = code
     try:
-        with open(constants.Hosting.HOSTING_JSON, "w") as config_file:
-            json.dump(hosting_config, config_file)
+        _write_hosting_config(hosting_config)
     except Exception as ex:
         console.warn(
             f"Unable to save token to {constants.Hosting.HOSTING_JSON} due to: {ex}"
         )
 
 
-def authenticated_token() -> str | None:
+def authenticated_token(skip_validate: bool = False) -> str | None:
     """Fetch the access token from the existing config if applicable and validate it.
 
+    A token the server confirmed valid within the last
+    constants.Hosting.TOKEN_VALIDATION_TTL seconds is not validated again.
+
+    Args:
+        skip_validate: Whether to return the token without validating it with the server.
+                       Requests sent with it should check for rejection with raise_if_token_rejected.
+
     Returns:
         The access token if it is valid, None otherwise.
     """
@@ -130,24 +380,72 @@ def authenticated_token() -> str | None:
         if not token:
             console.debug("No token found from the existing config.")
             return None
+        if skip_validate:
+            return token
+        if _token_validated_recently(token):
+            console.debug("Token was validated recently, skip validating again.")
+            return token
         validate_token(token)
+        _remember_validated_token(token)
         return token
+    except ValueError as ve:
+        console.debug(f"The token from the existing config is invalid: {ve}")
+        console.debug("Try to delete the invalid token from config file")
+        delete_token_from_config()
+        return None
     except Exception as ex:
         console.debug(f"Unable to validate the token from the existing config: {ex}")
-        try:
-            console.debug("Try to delete the invalid token from config file")
-            with open(constants.Hosting.HOSTING_JSON, "rw") as config_file:
-                hosting_config = json.load(config_file)
-                del hosting_config["access_token"]
-                json.dump(hosting_config, config_file)
-        except Exception as ex:
-            console.debug(f"Unable to delete the invalid token from config file: {ex}")
         return None
 
 
+def raise_if_token_rejected(token: str, response: httpx.Response):
+    """Check if the server rejected a request because of an invalid token.
+
+    The token is only validated once a request sent with it is rejected,
+    and deleted from the config if the server denies it.
+
+    Args:
+        token: The access token the request was sent with.
+        response: The response from the server.
+
+    Raises:
+        NotAuthenticatedError: If the server denies the token.
+    """
+    if response.status_code not in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+        return
+    if forget_token_if_denied(token):
+        raise NotAuthenticatedError("not authenticated")
+
+
+def forget_token_if_denied(token: str) -> bool:
+    """Validate a token the server rejected, and delete it from the config if denied.
+
+    A rejection may have other reasons, such as no access to the resource,
+    so the token is only deleted once the server confirms it is invalid.
+
+    Args:
+        token: The access token the server rejected.
+
+    Returns:
+        True if the server denied the token and it was deleted, False otherwise.
+    """
+    try:
+        validate_token(token)
+    except ValueError:
+        delete_token_from_config()
+        return True
+    except Exception as ex:
+        # Unable to tell, leave it to the caller to handle the rejection
+        console.debug(f"Unable to validate the rejected token due to: {ex}")
+    return False
+
+
+@functools.lru_cache(maxsize=4)
 def authorization_header(token: str) -> dict[str, str]:
     """Construct an authorization header with the specified token as bearer token.
 
+    The header is cached per token, so the returned dict must not be modified.
+
     Args:
         token: The access token to use.
 
@@ -157,6 +455,21 @@ def authorization_header(token: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {token}"}
 
 
+def exclude_none_params(params: dict[str, Any]) -> dict[str, Any]:
+    """Drop the params that are not set from a request body or query.
+
+    This is used instead of pydantic's dict(exclude_none=True) on the request params,
+    which walks the declared fields and allocates a new model dict for every request.
+
+    Args:
+        params: The params of the request.
+
+    Returns:
+        The params which are not None.
+    """
+    return {k: v for k, v in params.items() if v is not None}
+
+
 class DeploymentPrepInfo(Base):
     """The params/settings returned from the prepare endpoint
     including the deployment key and the frontend/backend URLs once deployed.
@@ -214,17 +527,6 @@ class DeploymentPrepareResponse(Base):
         return values
 
 
-class DeploymentsPreparePostParam(Base):
-    """Params for app API URL creation backend API."""
-
-    # The app name which is found in the config
-    app_name: str
-    # The deployment key
-    key: Optional[str] = None  #  name of the deployment
-    # The frontend hostname to deploy to. This is used to deploy at hostname not in the regular domain.
-    frontend_hostname: Optional[str] = None
-
-
 def prepare_deploy(
     app_name: str,
     key: str | None = None,
@@ -246,64 +548,67 @@ def prepare_deploy(
         The response containing the backend URLs if successful, None otherwise.
     """
     # Check if the user is authenticated
-    if not (token := authenticated_token()):
+    # The token is only validated if the server rejects the request
+    if not (token := authenticated_token(skip_validate=True)):
         raise Exception("not authenticated")
-    try:
-        response = httpx.post(
+    with _hosting_errors("prepare deploy", http_error=None):
+        response = get_http_client().post(
             constants.Hosting.POST_DEPLOYMENTS_PREPARE_ENDPOINT,
             headers=authorization_header(token),
-            json=DeploymentsPreparePostParam(
-                app_name=app_name, key=key, frontend_hostname=frontend_hostname
-            ).dict(exclude_none=True),
-            timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT,
-        )
-
-        response_json = response.json()
-        console.debug(f"Response from prepare endpoint: {response_json}")
-        if response.status_code == HTTPStatus.FORBIDDEN:
-            console.debug(f'Server responded with 403: {response_json.get("detail")}')
-            raise ValueError(f'{response_json.get("detail", "forbidden")}')
-        response.raise_for_status()
-        return DeploymentPrepareResponse(
-            app_prefix=response_json["app_prefix"],
-            reply=response_json["reply"],
-            suggestion=response_json["suggestion"],
-            existing=response_json["existing"],
+            json=exclude_none_params(
+                dict(app_name=app_name, key=key, frontend_hostname=frontend_hostname)
+            ),
         )
-    except httpx.RequestError as re:
-        console.debug(f"Unable to prepare launch due to {re}.")
-        raise Exception("request error") from re
-    except httpx.HTTPError as he:
-        console.debug(f"Unable to prepare deploy due to {he}.")
-        raise Exception(f"{he}") from he
-    except json.JSONDecodeError as jde:
-        console.debug(f"Server did not respond with valid json: {jde}")
-        raise Exception("internal errors") from jde
-    except (KeyError, ValidationError) as kve:
-        console.debug(f"The server response format is unexpected {kve}")
-        raise Exception("internal errors") from kve
-    except ValueError as ve:
-        # This is a recognized client error, currently indicates forbidden
-        raise Exception(f"{ve}") from ve
-    except Exception as ex:
-        console.debug(f"Unexpected error: {ex}.")
-        raise Exception("internal errors") from ex
+        raise_if_token_rejected(token, response)
+
+        response_json = _json_loads(response.content)
+        if console.is_debug():
+            console.debug(f"Response from prepare endpoint: {response_json}")
+        if response.status_code != HTTPStatus.FORBIDDEN:
+            response.raise_for_status()
+            return DeploymentPrepareResponse(
+                app_prefix=response_json["app_prefix"],
+                reply=response_json["reply"],
+                suggestion=response_json["suggestion"],
+                existing=response_json["existing"],
+            )
+        forbidden_detail = response_json.get("detail", "forbidden")
+    # This is a recognized client error, currently indicates forbidden
+    console.debug(f"Server responded with 403: {forbidden_detail}")
+    raise Exception(f"{forbidden_detail}")
 
 
 class DeploymentPostResponse(Base):
     """The URL for the deployed site."""
 
     # The frontend URL
-    frontend_url: str = Field(..., regex=r"^https?://", min_length=8)
+    frontend_url: str = Field(..., min_length=8)
     # The backend URL
-    backend_url: str = Field(..., regex=r"^https?://", min_length=8)
+    backend_url: str = Field(..., min_length=8)
+
+    @validator("frontend_url", "backend_url")
+    def ensure_http_url(cls, v):
+        """Ensure the URL uses the http or https scheme.
+
+        Args:
+            v: The URL to check.
+
+        Raises:
+            ValueError: If the URL does not start with http:// or https://.
+
+        Returns:
+            The URL.
+        """
+        if not v.startswith(("http://", "https://")):
+            raise ValueError("URL should start with http:// or https://.")
+        return v
 
 
 class DeploymentsPostParam(Base):
     """Params for hosted instance deployment POST request."""
 
     # Key is the name of the deployment, it becomes part of the URL
-    key: str = Field(..., regex=r"^[a-zA-Z0-9-]+$")
+    key: str
     # Name of the app
     app_name: str = Field(..., min_length=1)
     # json encoded list of regions to deploy to
@@ -331,6 +636,23 @@ class DeploymentsPostParam(Base):
     # The metrics endpoint
     metrics_endpoint: Optional[str] = None
 
+    @validator("key")
+    def ensure_valid_key(cls, v):
+        """Ensure the key only has letters, digits and hyphens.
+
+        Args:
+            v: The key to check.
+
+        Raises:
+            ValueError: If the key has any other characters.
+
+        Returns:
+            The key.
+        """
+        if not _DEPLOYMENT_KEY_PATTERN.fullmatch(v):
+            raise ValueError("Key should only contain letters, digits and hyphens.")
+        return v
+
 
 def deploy(
     frontend_file_name: str,
@@ -376,21 +698,21 @@ def deploy(
     Returns:
         The response containing the URL of the site to be deployed if successful, None otherwise.
     """
-    # Check if the user is authenticated
-    if not (token := authenticated_token()):
+    # Check if the user is authenticated, the token is only validated if the server rejects the request
+    if not (token := authenticated_token(skip_validate=True)):
         raise Exception("not authenticated")
 
-    try:
+    with _hosting_errors("deploy"):
         params = DeploymentsPostParam(
             key=key,
             app_name=app_name,
-            regions_json=json.dumps(regions),
+            regions_json=_json_dumps(regions),
             app_prefix=app_prefix,
             cpus=cpus,
             memory_mb=memory_mb,
             auto_start=auto_start,
             auto_stop=auto_stop,
-            envs_json=json.dumps(envs) if envs else None,
+            envs_json=_json_dumps(envs) if envs else None,
             frontend_hostname=frontend_hostname,
             reflex_version=constants.Reflex.VERSION,
             reflex_cli_entrypoint=with_tracing,
@@ -402,44 +724,25 @@ def deploy(
             os.path.join(export_dir, backend_file_name), "rb"
         ) as backend_file:
             # https://docs.python-requests.org/en/latest/user/advanced/#post-multiple-multipart-encoded-files
+            # The open files are passed as is, httpx computes their sizes up front
+            # and streams them in chunks, so the zips are never read whole into memory.
             files = [
-                ("files", (frontend_file_name, frontend_file)),
-                ("files", (backend_file_name, backend_file)),
+                ("files", (frontend_file_name, frontend_file, "application/zip")),
+                ("files", (backend_file_name, backend_file, "application/zip")),
             ]
-            response = httpx.post(
+            response = get_http_client().post(
                 constants.Hosting.POST_DEPLOYMENTS_ENDPOINT,
                 headers=authorization_header(token),
-                data=params.dict(exclude_none=True),
+                data=exclude_none_params(params.__dict__),
                 files=files,
             )
+        raise_if_token_rejected(token, response)
         response.raise_for_status()
-        response_json = response.json()
+        response_json = _json_loads(response.content)
         return DeploymentPostResponse(
             frontend_url=response_json["frontend_url"],
             backend_url=response_json["backend_url"],
         )
-    except httpx.RequestError as re:
-        console.debug(f"Unable to deploy due to request error: {re}")
-        raise Exception("request error") from re
-    except httpx.HTTPError as he:
-        console.debug(f"Unable to deploy due to {he}.")
-        raise Exception("internal errors") from he
-    except json.JSONDecodeError as jde:
-        console.debug(f"Server did not respond with valid json: {jde}")
-        raise Exception("internal errors") from jde
-    except (KeyError, ValidationError) as kve:
-        console.debug(f"Post params or server response format unexpected: {kve}")
-        raise Exception("internal errors") from kve
-    except Exception as ex:
-        console.debug(f"Unable to deploy due to internal errors: {ex}.")
-        raise Exception("internal errors") from ex
-
-
-class DeploymentsGetParam(Base):
-    """Params for hosted instance GET request."""
-
-    # The app name which is found in the config
-    app_name: Optional[str]
 
 
 class DeploymentGetResponse(Base):
@@ -463,10 +766,10 @@ class DeploymentGetResponse(Base):
     envs: List[str]
 
 
-def list_deployments(
+def iter_deployments(
     app_name: str | None = None,
-) -> list[dict]:
-    """Send a GET request to Control Plane to list deployments.
+) -> Generator[dict, None, None]:
+    """Send a GET request to Control Plane to list deployments, yielding them one by one.
 
     Args:
         app_name: the app name as an optional filter when listing deployments.
@@ -474,47 +777,55 @@ def list_deployments(
     Raises:
         Exception: If the operation fails. The exception message shows the reason.
 
-    Returns:
-        The list of deployments if successful, None otherwise.
+    Yields:
+        The deployments, each as a dict of the DeploymentGetResponse fields.
     """
-    if not (token := authenticated_token()):
+    # The token is only validated if the server rejects the request
+    if not (token := authenticated_token(skip_validate=True)):
         raise Exception("not authenticated")
 
-    params = DeploymentsGetParam(app_name=app_name)
-
-    try:
-        response = httpx.get(
+    with _hosting_errors("list deployments", request_error="request timeout"):
+        response = get_http_client().get(
             constants.Hosting.GET_DEPLOYMENTS_ENDPOINT,
             headers=authorization_header(token),
-            params=params.dict(exclude_none=True),
-            timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT,
+            params=exclude_none_params(dict(app_name=app_name)),
         )
+        raise_if_token_rejected(token, response)
         response.raise_for_status()
-        return [
-            DeploymentGetResponse(
-                key=deployment["key"],
-                regions=deployment["regions"],
-                app_name=deployment["app_name"],
-                vm_type=deployment["vm_type"],
-                cpus=deployment["cpus"],
-                memory_mb=deployment["memory_mb"],
-                url=deployment["url"],
-                envs=deployment["envs"],
-            ).dict()
-            for deployment in response.json()
-        ]
-    except httpx.RequestError as re:
-        console.debug(f"Unable to list deployments due to request error: {re}")
-        raise Exception("request timeout") from re
-    except httpx.HTTPError as he:
-        console.debug(f"Unable to list deployments due to {he}.")
-        raise Exception("internal errors") from he
-    except (ValidationError, KeyError, json.JSONDecodeError) as vkje:
-        console.debug(f"Server response format unexpected: {vkje}")
-        raise Exception("internal errors") from vkje
-    except Exception as ex:
-        console.error(f"Unexpected error: {ex}.")
-        raise Exception("internal errors") from ex
+        # The server payload is trusted, so pick the expected fields directly
+        # instead of validating a model for every deployment.
+        fields = list(DeploymentGetResponse.__fields__)
+        for deployment in _json_loads(response.content):
+            yield {field: deployment[field] for field in fields}
+
+
+def list_deployments(
+    app_name: str | None = None,
+) -> list[dict]:
+    """Send a GET request to Control Plane to list deployments.
+
+    Args:
+        app_name: the app name as an optional filter when listing deployments.
+
+    Returns:
+        The list of deployments if successful, None otherwise.
+    """
+    return list(iter_deployments(app_name))
+
+
+def get_deployment(key: str) -> dict | None:
+    """Find a deployment by its key.
+
+    Args:
+        key: The deployment name.
+
+    Returns:
+        The deployment if found, None otherwise.
+    """
+    return next(
+        (deployment for deployment in iter_deployments() if deployment["key"] == key),
+        None,
+    )
 
 
 def fetch_token(request_id: str) -> tuple[str, str]:
@@ -523,34 +834,19 @@ def fetch_token(request_id: str) -> tuple[str, str]:
     Args:
         request_id: The request ID used when the user opens the browser for authentication.
 
-    Raises:
-        Exception: For request timeout, failed requests, ill-formed responses, unexpected errors.
-
     Returns:
         The access token if it exists, None otherwise.
     """
-    try:
-        resp = httpx.get(
+    with _hosting_errors(
+        "fetch token", request_error="request timeout", http_error="not found"
+    ):
+        resp = get_http_client().get(
             f"{constants.Hosting.FETCH_TOKEN_ENDPOINT}/{request_id}",
-            timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT,
         )
         resp.raise_for_status()
-        return (resp_json := resp.json())["access_token"], resp_json.get("code", "")
-    except httpx.RequestError as re:
-        console.debug(f"Unable to fetch token due to request error: {re}")
-        raise Exception("request timeout") from re
-    except httpx.HTTPError as he:
-        console.debug(f"Unable to fetch token due to {he}")
-        raise Exception("not found") from he
-    except json.JSONDecodeError as jde:
-        console.debug(f"Server did not respond with valid json: {jde}")
-        raise Exception("internal errors") from jde
-    except KeyError as ke:
-        console.debug(f"Server response format unexpected: {ke}")
-        raise Exception("internal errors") from ke
-    except Exception as ex:
-        console.debug("Unexpected errors: {ex}")
-        raise Exception("internal errors") from ex
+        return (resp_json := _json_loads(resp.content))["access_token"], resp_json.get(
+            "code", ""
+        )
 
 
 def poll_backend(backend_url: str) -> bool:
@@ -563,10 +859,9 @@ def poll_backend(backend_url: str) -> bool:
         True if the backend is up, False otherwise.
     """
     try:
-        console.debug(f"Polling backend at {backend_url}")
-        resp = httpx.get(
-            f"{backend_url}/ping", timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT
-        )
+        if console.is_debug():
+            console.debug(f"Polling backend at {backend_url}")
+        resp = get_http_client().get(f"{backend_url}/ping")
         resp.raise_for_status()
         return True
     except httpx.HTTPError:
@@ -583,16 +878,63 @@ def poll_frontend(frontend_url: str) -> bool:
         True if the frontend is up, False otherwise.
     """
     try:
-        console.debug(f"Polling frontend at {frontend_url}")
-        resp = httpx.get(
-            f"{frontend_url}", timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT
-        )
+        if console.is_debug():
+            console.debug(f"Polling frontend at {frontend_url}")
+        resp = get_http_client().get(f"{frontend_url}")
         resp.raise_for_status()
         return True
     except httpx.HTTPError:
         return False
 
 
+async def _poll_site(client: httpx.AsyncClient, url: str) -> bool:
+    """Poll a site to check if it is up.
+
+    Args:
+        client: The async HTTP client to send the request with.
+        url: The URL to poll.
+
+    Returns:
+        True if the site is up, False otherwise.
+    """
+    try:
+        if console.is_debug():
+            console.debug(f"Polling site at {url}")
+        resp = await client.get(url)
+        resp.raise_for_status()
+        return True
+    except httpx.HTTPError:
+        return False
+
+
+async def poll_sites_async(urls: list[str]) -> list[bool]:
+    """Poll several sites concurrently to check if they are up.
+
+    Args:
+        urls: The URLs to poll.
+
+    Returns:
+        Whether each site is up, in the same order as the URLs.
+    """
+    async with httpx.AsyncClient(**_http_client_settings()) as client:
+        return list(await asyncio.gather(*(_poll_site(client, url) for url in urls)))
+
+
+def poll_sites(urls: list[str]) -> list[bool]:
+    """Poll several sites concurrently to check if they are up.
+
+    All the requests are in flight at the same time, so polling N sites
+    takes about one round trip instead of N.
+
+    Args:
+        urls: The URLs to poll.
+
+    Returns:
+        Whether each site is up, in the same order as the URLs.
+    """
+    return asyncio.run(poll_sites_async(urls))
+
+
 class DeploymentDeleteParam(Base):
     """Params for hosted instance DELETE request."""
 
@@ -610,29 +952,20 @@ def delete_deployment(key: str):
         ValueError: If the key is not provided.
         Exception: If the operation fails. The exception message is the reason.
     """
-    if not (token := authenticated_token()):
+    # The token is only validated if the server rejects the request
+    if not (token := authenticated_token(skip_validate=True)):
         raise Exception("not authenticated")
     if not key:
         raise ValueError("Valid key is required for the delete.")
 
-    try:
-        response = httpx.delete(
+    with _hosting_errors("delete deployment", timeout_error="request timeout"):
+        response = get_http_client().delete(
             f"{constants.Hosting.DELETE_DEPLOYMENTS_ENDPOINT}/{key}",
             headers=authorization_header(token),
-            timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT,
         )
+        raise_if_token_rejected(token, response)
         response.raise_for_status()
 
-    except httpx.TimeoutException as te:
-        console.debug("Unable to delete deployment due to request timeout.")
-        raise Exception("request timeout") from te
-    except httpx.HTTPError as he:
-        console.debug(f"Unable to delete deployment due to {he}.")
-        raise Exception("internal errors") from he
-    except Exception as ex:
-        console.debug(f"Unexpected errors {ex}.")
-        raise Exception("internal errors") from ex
-
 
 class SiteStatus(Base):
     """Deployment status info."""
@@ -691,17 +1024,18 @@ def get_deployment_status(key: str) -> DeploymentStatusResponse:
             "A non empty key is required for querying the deployment status."
         )
 
-    if not (token := authenticated_token()):
+    # The token is only validated if the server rejects the request
+    if not (token := authenticated_token(skip_validate=True)):
         raise Exception("not authenticated")
 
-    try:
-        response = httpx.get(
+    with _hosting_errors("get deployment status", request_error="internal errors"):
+        response = get_http_client().get(
             f"{constants.Hosting.GET_DEPLOYMENT_STATUS_ENDPOINT}/{key}/status",
             headers=authorization_header(token),
-            timeout=constants.Hosting.HTTP_REQUEST_TIMEOUT,
         )
+        raise_if_token_rejected(token, response)
         response.raise_for_status()
-        response_json = response.json()
+        response_json = _json_loads(response.content)
         return DeploymentStatusResponse(
             frontend=SiteStatus(
                 frontend_url=response_json["frontend"]["url"],
@@ -714,9 +1048,47 @@ def get_deployment_status(key: str) -> DeploymentStatusResponse:
                 updated_at=response_json["backend"]["updated_at"],
             ),
         )
-    except Exception as ex:
-        console.debug(f"Unable to get deployment status due to {ex}.")
-        raise Exception("internal errors") from ex
+
+
+async def status_and_poll_async(
+    key: str,
+) -> tuple[DeploymentStatusResponse, bool, bool]:
+    """Get the deployment status, then poll the frontend and backend concurrently.
+
+    Args:
+        key: The deployment name.
+
+    Returns:
+        The deployment status, whether the frontend is up and whether the backend is up.
+    """
+    # The polls need the URLs from the status, so the status request goes first
+    status = await asyncio.get_running_loop().run_in_executor(
+        None, get_deployment_status, key
+    )
+    frontend_url, backend_url = status.frontend.frontend_url, status.backend.backend_url
+    # The backend only answers on its ping endpoint, same as poll_backend
+    if backend_url:
+        backend_url = f"{backend_url}/ping"
+    # A site without a URL is not up, there is nothing to poll
+    polled = [url for url in (frontend_url, backend_url) if url]
+    reachable = dict(zip(polled, await poll_sites_async(polled)))
+    return (
+        status,
+        reachable.get(frontend_url, False),
+        reachable.get(backend_url, False),
+    )
+
+
+def status_and_poll(key: str) -> tuple[DeploymentStatusResponse, bool, bool]:
+    """Get the deployment status, then poll the frontend and backend concurrently.
+
+    Args:
+        key: The deployment name.
+
+    Returns:
+        The deployment status, whether the frontend is up and whether the backend is up.
+    """
+    return asyncio.run(status_and_poll_async(key))
 
 
 def convert_to_local_time(iso_timestamp: str) -> str:
@@ -726,12 +1098,35 @@ def convert_to_local_time(iso_timestamp: str) -> str:
         iso_timestamp: The iso timestamp to convert.
 
     Returns:
-        The converted timestamp string.
+        The converted timestamp string, or the timestamp as is if it cannot be converted.
+    """
+    # Only strings go through the cache, other values may not be hashable
+    if not isinstance(iso_timestamp, str):
+        console.debug(f"Unable to convert iso timestamp {iso_timestamp}, not a string.")
+        return iso_timestamp
+    return _convert_to_local_time(iso_timestamp)
+
+
+# Streamed log lines often share timestamps, so the conversions are cached
+@functools.lru_cache(maxsize=1024)
+def _convert_to_local_time(iso_timestamp: str) -> str:
+    """Convert the iso timestamp string to local time.
+
+    Args:
+        iso_timestamp: The iso timestamp to convert.
+
+    Returns:
+        The converted timestamp string, or the timestamp as is if it is not valid.
     """
     try:
-        local_dt = datetime.fromisoformat(iso_timestamp).astimezone()
-        return local_dt.strftime("%Y-%m-%d %H:%M:%S.%f %Z")
-    except Exception as ex:
+        dt = datetime.fromisoformat(iso_timestamp)
+        # The server reports naive timestamps in UTC
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        local_dt = dt.astimezone()
+        # isoformat is implemented in C, unlike strftime which interprets the format string per call
+        return local_dt.isoformat(sep=" ", timespec="microseconds")
+    except (TypeError, ValueError) as ex:
         console.debug(f"Unable to convert iso timestamp {iso_timestamp} due to {ex}.")
         return iso_timestamp
 
@@ -750,6 +1145,29 @@ class LogType(str, enum.Enum):
     ALL_LOG = "all"
 
 
+def _write_lines(lines: list[str]):
+    """Write the buffered lines to stdout at once and clear the buffer.
+
+    Args:
+        lines: The lines to write, each ending with a newline.
+    """
+    if lines:
+        sys.stdout.write("".join(lines))
+        sys.stdout.flush()
+        lines.clear()
+
+
+def _print_lines(lines: list[str]):
+    """Print the buffered lines to the console at once and clear the buffer.
+
+    Args:
+        lines: The lines to print, without trailing newlines.
+    """
+    if lines:
+        console.print("\n".join(lines))
+        lines.clear()
+
+
 async def get_logs(
     key: str,
     log_type: LogType = LogType.APP_LOG,
@@ -766,34 +1184,58 @@ async def get_logs(
 
     Raises:
         ValueError: If the key is not provided.
+        NotAuthenticatedError: If the server denies the access token.
         Exception: If the operation fails. The exception message is the reason.
 
     """
-    if not (token := authenticated_token()):
+    # The log server rejects an invalid token on connect, no need to validate it first
+    if not (token := authenticated_token(skip_validate=True)):
         raise Exception("not authenticated")
     if not key:
         raise ValueError("Valid key is required for querying logs.")
+    # The log lines received but not yet written to stdout
+    lines: list[str] = []
     try:
-        logs_endpoint = f"{constants.Hosting.DEPLOYMENT_LOGS_ENDPOINT}/{key}/logs?access_token={token}&log_type={log_type.value}"
-        console.debug(f"log server endpoint: {logs_endpoint}")
+        query = {"access_token": token, "log_type": log_type.value}
         if from_iso_timestamp is not None:
-            logs_endpoint += (
-                f"&from_iso_timestamp={from_iso_timestamp.astimezone().isoformat()}"
-            )
-        _ws = websockets.connect(logs_endpoint)  # type: ignore
+            query["from_iso_timestamp"] = from_iso_timestamp.astimezone().isoformat()
+        logs_endpoint = f"{constants.Hosting.DEPLOYMENT_LOGS_ENDPOINT}/{key}/logs?{urlencode(query)}"
+        console.debug(f"log server endpoint: {logs_endpoint}")
+        # Log messages are small, skip negotiating per-message compression
+        _ws = websockets.connect(logs_endpoint, compression=None)  # type: ignore
         async with _ws as ws:
             while True:
-                row_json = json.loads(await ws.recv())
-                console.debug(f"Server responded with logs: {row_json}")
+                try:
+                    # With lines pending, only wait briefly for more before writing them out
+                    message = await asyncio.wait_for(
+                        ws.recv(),
+                        timeout=constants.Hosting.LOG_FLUSH_INTERVAL if lines else None,
+                    )
+                except asyncio.TimeoutError:
+                    _write_lines(lines)
+                    continue
+                row_json = _json_loads(message)
+                if console.is_debug():
+                    console.debug(f"Server responded with logs: {row_json}")
                 if row_json and isinstance(row_json, dict):
                     if "timestamp" in row_json:
                         row_json["timestamp"] = convert_to_local_time(
                             row_json["timestamp"]
                         )
-                    print(" | ".join(row_json.values()))
+                    lines.append(" | ".join(row_json.values()) + "\n")
+                    if len(lines) >= constants.Hosting.LOG_FLUSH_LINES:
+                        _write_lines(lines)
                 else:
                     console.debug("Server responded, no new logs, this is normal")
     except Exception as ex:
+        _write_lines(lines)
+        if isinstance(ex, InvalidStatusCode) and ex.status_code in (
+            HTTPStatus.UNAUTHORIZED,
+            HTTPStatus.FORBIDDEN,
+        ):
+            console.debug(f"Log server rejected the connection: {ex}")
+            if forget_token_if_denied(token):
+                raise NotAuthenticatedError("not authenticated") from ex
         console.debug(f"Unable to get more deployment logs due to {ex}.")
         console.print("Log server disconnected ...")
         console.print(
@@ -813,6 +1255,26 @@ def check_requirements_txt_exist():
         )
 
 
+def _backoff_delay(attempt: int) -> float:
+    """Get how long to wait before retrying an authentication request.
+
+    The wait grows exponentially with the attempts, up to
+    constants.Hosting.WEB_AUTH_SLEEP_DURATION, plus a random jitter.
+
+    Args:
+        attempt: The number of failed attempts before this one, starting from 0.
+
+    Returns:
+        The time to wait in seconds.
+    """
+    delay = min(
+        constants.Hosting.WEB_AUTH_INITIAL_SLEEP_DURATION
+        * constants.Hosting.WEB_AUTH_BACKOFF_FACTOR**attempt,
+        constants.Hosting.WEB_AUTH_SLEEP_DURATION,
+    )
+    return delay + random.uniform(0, constants.Hosting.WEB_AUTH_BACKOFF_JITTER)
+
+
 def authenticate_on_browser(
     invitation_code: str | None,
 ) -> tuple[str | None, str | None]:
@@ -836,13 +1298,17 @@ def authenticate_on_browser(
             f"Unable to open the browser to authenticate. Please contact support."
         )
         raise SystemExit("Unable to open browser for authentication.")
+    # Check often at first in case the user is quick, then back off within the same time limit
+    deadline = time.monotonic() + (
+        constants.Hosting.WEB_AUTH_RETRIES * constants.Hosting.WEB_AUTH_SLEEP_DURATION
+    )
     with console.status("Waiting for access token ..."):
-        for _ in range(constants.Hosting.WEB_AUTH_RETRIES):
-            try:
+        for attempt in itertools.count():
+            with contextlib.suppress(Exception):
                 return fetch_token(request_id)
-            except Exception:
-                pass
-            time.sleep(constants.Hosting.WEB_AUTH_SLEEP_DURATION)
+            if (remaining := deadline - time.monotonic()) <= 0:
+                break
+            time.sleep(min(_backoff_delay(attempt), remaining))
 
     return None, None
 
@@ -859,10 +1325,17 @@ def validate_token_with_retries(access_token: str) -> bool:
     Returns:
         True if the token is valid, False otherwise.
     """
-    with console.status("Validating access token ..."):
-        for _ in range(constants.Hosting.WEB_AUTH_RETRIES):
+    if _token_validated_recently(access_token):
+        console.debug("Token was validated recently, skip validating again.")
+        return True
+    with contextlib.ExitStack() as stack:
+        for attempt in range(constants.Hosting.WEB_AUTH_RETRIES):
+            if attempt == 1:
+                # The first attempt usually succeeds quickly, show the spinner only for the retries
+                stack.enter_context(console.status("Validating access token ..."))
             try:
                 validate_token(access_token)
+                _remember_validated_token(access_token)
                 return True
             except ValueError as ve:
                 console.error(f"Access denied")
@@ -870,7 +1343,9 @@ def validate_token_with_retries(access_token: str) -> bool:
                 raise SystemExit("Access denied") from ve
             except Exception as ex:
                 console.debug(f"Unable to validate token due to: {ex}")
-                time.sleep(constants.Hosting.WEB_AUTH_SLEEP_DURATION)
+                # No need to wait after the last attempt
+                if attempt < constants.Hosting.WEB_AUTH_RETRIES - 1:
+                    time.sleep(_backoff_delay(attempt))
     return False
 
 
@@ -907,8 +1382,15 @@ def interactive_get_deployment_key_from_user_input(
         api_url = suggestion.api_url
         deploy_url = suggestion.deploy_url
 
+        # The names the server did not confirm, no need to ask the server again
+        rejected_keys: set[str] = set()
         # If user takes the suggestion, we will use the suggested key and proceed
         while key_input := console.ask(f"Name of deployment", default=key_candidate):
+            if key_input in rejected_keys:
+                console.error(
+                    "Cannot deploy at this name, try picking a different name"
+                )
+                continue
             try:
                 pre_deploy_response = prepare_deploy(
                     app_name,
@@ -922,7 +1404,13 @@ def interactive_get_deployment_key_from_user_input(
                 deploy_url = pre_deploy_response.reply.deploy_url
                 # we get the confirmation, so break from the loop
                 break
+            except AssertionError:
+                rejected_keys.add(key_input)
+                console.error(
+                    "Cannot deploy at this name, try picking a different name"
+                )
             except Exception:
+                # The request may fail temporarily, so the name can be tried again
                 console.error(
                     "Cannot deploy at this name, try picking a different name"
                 )
@@ -944,15 +1432,15 @@ def process_envs(envs: list[str]) -> dict[str, str]:
     """
     processed_envs = {}
     for env in envs:
-        kv = env.split("=", maxsplit=1)
-        if len(kv) != 2:
+        name, sep, value = env.partition("=")
+        if not sep:
             raise SystemExit("Invalid env format: should be <key>=<value>.")
 
-        if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", kv[0]):
+        if not _ENV_NAME_PATTERN.fullmatch(name):
             raise SystemExit(
                 "Invalid env name: should start with a letter or underscore, followed by letters, digits, or underscores."
             )
-        processed_envs[kv[0]] = kv[1]
+        processed_envs[name] = value
     return processed_envs
 
 
@@ -968,12 +1456,72 @@ def log_out_on_browser():
         _, invitation_code = get_existing_access_token()
         console.debug("Found existing invitation code in config")
     console.print(f"Opening {constants.Hosting.CP_WEB_URL} ...")
-    if not webbrowser.open(f"{constants.Hosting.CP_WEB_URL}?code={invitation_code}"):
+    # Opening the browser can block while the browser process starts, do not wait on it for long.
+    # The thread is a daemon, so a slow browser launch does not hold up the CLI exit either.
+    result: list[bool] = []
+    done = threading.Event()
+
+    def open_browser():
+        try:
+            result.append(
+                webbrowser.open(
+                    f"{constants.Hosting.CP_WEB_URL}?code={invitation_code}"
+                )
+            )
+        finally:
+            done.set()
+
+    threading.Thread(target=open_browser, daemon=True).start()
+    if not done.wait(timeout=constants.Hosting.BROWSER_OPEN_TIMEOUT):
+        console.debug("The browser is still starting, assume it opens.")
+    elif not (result and result[0]):
         raise SystemExit(
             f"Unable to open the browser to log out. Please contact support."
         )
 
 
+async def _read_messages(
+    ws: websockets.WebSocketClientProtocol, messages: asyncio.Queue
+):
+    """Read the websocket messages into a queue as soon as they arrive.
+
+    Reading runs apart from processing the messages, so the processing can take
+    all the messages received so far at once.
+
+    Args:
+        ws: The websocket connection to read from.
+        messages: The queue to put the messages in. The error closing the
+                  connection is put last.
+    """
+    try:
+        while True:
+            messages.put_nowait(await ws.recv())
+    except Exception as ex:
+        messages.put_nowait(ex)
+
+
+def _add_milestone_line(message: str | bytes, lines: list[str]) -> bool:
+    """Add the deploy milestone line from a server message to the lines to print.
+
+    Args:
+        message: The message received from the server, text or binary JSON.
+        lines: The lines to print.
+
+    Returns:
+        True if the message is the end of the deployment, False otherwise.
+    """
+    row_json = _json_loads(message)
+    if console.is_debug():
+        console.debug(f"Server responded with: {row_json}")
+    if not (row_json and isinstance(row_json, dict)):
+        console.debug("Server responded, no new events yet, this is normal")
+        return False
+    # The events have a fixed shape, only the timestamp and actual message are shown
+    event_timestamp, event_message = row_json["timestamp"], row_json["message"]
+    lines.append(f"{convert_to_local_time(event_timestamp)} | {event_message}")
+    return _END_OF_DEPLOYMENT_PATTERN.search(event_message) is not None
+
+
 async def display_deploy_milestones(key: str, from_iso_timestamp: datetime):
     """Display the deploy milestone messages reported back from the hosting server.
 
@@ -990,36 +1538,43 @@ async def display_deploy_milestones(key: str, from_iso_timestamp: datetime):
     if not (token := authenticated_token()):
         raise Exception("not authenticated")
 
+    # The event messages received but not yet printed
+    lines: list[str] = []
     try:
-        logs_endpoint = f"{constants.Hosting.DEPLOYMENT_LOGS_ENDPOINT}/{key}/logs?access_token={token}&log_type={LogType.DEPLOY_LOG.value}&from_iso_timestamp={from_iso_timestamp.astimezone().isoformat()}"
+        query = {
+            "access_token": token,
+            "log_type": LogType.DEPLOY_LOG.value,
+            "from_iso_timestamp": from_iso_timestamp.astimezone().isoformat(),
+        }
+        logs_endpoint = f"{constants.Hosting.DEPLOYMENT_LOGS_ENDPOINT}/{key}/logs?{urlencode(query)}"
         console.debug(f"log server endpoint: {logs_endpoint}")
-        _ws = websockets.connect(logs_endpoint)  # type: ignore
+        # Log messages are small, skip negotiating per-message compression
+        _ws = websockets.connect(logs_endpoint, compression=None)  # type: ignore
         async with _ws as ws:
-            # Stream back the deploy events reported back from the server
-            for _ in range(constants.Hosting.DEPLOYMENT_EVENT_MESSAGES_RETRIES):
-                row_json = json.loads(await ws.recv())
-                console.debug(f"Server responded with: {row_json}")
-                if row_json and isinstance(row_json, dict):
-                    # Only show the timestamp and actual message
-                    console.print(
-                        " | ".join(
-                            [
-                                convert_to_local_time(row_json["timestamp"]),
-                                row_json["message"],
-                            ]
+            messages: asyncio.Queue[str | bytes | Exception] = asyncio.Queue()
+            reader = asyncio.create_task(_read_messages(ws, messages))
+            try:
+                # Stream back the deploy events reported back from the server
+                for _ in range(constants.Hosting.DEPLOYMENT_EVENT_MESSAGES_RETRIES):
+                    # Print the messages received so far once there are no more to process
+                    if messages.empty():
+                        _print_lines(lines)
+                    if isinstance(message := await messages.get(), Exception):
+                        console.debug(
+                            f"Unable to get more deployment events due to {message}."
                         )
-                    )
-                    if any(
-                        msg in row_json["message"].lower()
-                        for msg in constants.Hosting.END_OF_DEPLOYMENT_MESSAGES
-                    ):
+                        break
+                    if _add_milestone_line(message, lines):
+                        _print_lines(lines)
                         console.debug(
                             "Received end of deployment message, stop event message streaming"
                         )
                         return
-                else:
-                    console.debug("Server responded, no new events yet, this is normal")
+            finally:
+                reader.cancel()
+        _print_lines(lines)
     except Exception as ex:
+        _print_lines(lines)
         console.debug(f"Unable to get more deployment events due to {ex}.")
 
 
@@ -1028,8 +1583,36 @@ def wait_for_server_to_pick_up_request():
     with console.status(
         f"Waiting for server to pick up request ~ {constants.Hosting.DEPLOYMENT_PICKUP_DELAY} seconds ..."
     ):
-        for _ in range(constants.Hosting.DEPLOYMENT_PICKUP_DELAY):
-            time.sleep(1)
+        time.sleep(constants.Hosting.DEPLOYMENT_PICKUP_DELAY)
+
+
+# An inline comment starts with a "#" preceded by whitespace
+_ENV_INLINE_COMMENT_PATTERN = re.compile(r"\s+#")
+
+
+def _parse_env_line(line: str) -> str:
+    """Parse a name=value line in .env file syntax.
+
+    A leading "export ", quotes around the value and an inline " # comment"
+    after an unquoted value are removed.
+
+    Args:
+        line: The env line.
+
+    Returns:
+        The env in key=value string format.
+    """
+    line = line.strip()
+    if line.startswith("export "):
+        line = line[len("export ") :].lstrip()
+    name, _, value = line.partition("=")
+    name, value = name.strip(), value.strip()
+    if value[:1] in ("'", '"') and (end := value.find(value[0], 1)) > 0:
+        # Anything after the closing quote, such as a comment, is dropped
+        value = value[1:end]
+    else:
+        value = _ENV_INLINE_COMMENT_PATTERN.split(value, maxsplit=1)[0]
+    return f"{name}={value}"
 
 
 def interactive_prompt_for_envs() -> list[str]:
@@ -1041,9 +1624,11 @@ def interactive_prompt_for_envs() -> list[str]:
     envs = []
     envs_finished = False
     env_key_prompt = "  Env name (enter to skip)"
-    console.print("Environment variables ...")
+    console.print(
+        "Environment variables ... (name=value lines are accepted too, an empty line finishes)"
+    )
     while not envs_finished:
-        env_key = console.ask(env_key_prompt)
+        env_key = (console.ask(env_key_prompt) or "").strip()
         env_key_prompt = "  env name (enter to finish)"
         if not env_key:
             envs_finished = True
@@ -1052,6 +1637,13 @@ def interactive_prompt_for_envs() -> list[str]:
             else:
                 console.print("No envs added. Continuing ...")
             break
+        if env_key.startswith("#"):
+            # Skip the comments pasted from a .env file
+            continue
+        if "=" in env_key:
+            # A whole env line, no need to prompt for the value
+            envs.append(_parse_env_line(env_key))
+            continue
         # If it possible to have empty values for env, so we do not check here
         env_value = console.ask("  env value")
         envs.append(f"{env_key}={env_value}")
@@ -1,11 +1,34 @@
+import base64
 import json
-from unittest.mock import Mock, mock_open
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock, mock_open
+from urllib.parse import parse_qs
 
 import httpx
 import pytest
+from pydantic import ValidationError
+from websockets.exceptions import InvalidStatusCode
 
 from reflex import constants
 from reflex.utils import hosting
+from reflex.utils.exceptions import NotAuthenticatedError
+
+
+@pytest.fixture(autouse=True)
+def reset_hosting_caches(mocker, tmp_path):
+    # Config read and tokens validated in one test should not leak into the next
+    mocker.patch.object(hosting, "_hosting_config", None)
+    mocker.patch.object(hosting, "_validated_token", None)
+    mocker.patch.object(
+        constants.Hosting, "TOKEN_CACHE_JSON", str(tmp_path / "token_cache.json")
+    )
+
+
+def test_http_client_is_shared():
+    # Requests to the hosting service reuse one pooled client
+    assert hosting.get_http_client() is hosting.get_http_client()
 
 
 def test_get_existing_access_token_and_no_invitation_code(mocker):
@@ -26,6 +49,23 @@ def test_get_existing_access_token_and_invitation_code(mocker):
     assert code == mock_hosting_config["code"]
 
 
+def test_existing_access_token_read_once(mocker):
+    mock_hosting_config = {"access_token": "ejJhfake_token", "code": "fake_code"}
+    mock_file = mocker.patch(
+        "builtins.open", mock_open(read_data=json.dumps(mock_hosting_config))
+    )
+    mocker.patch("reflex.utils.hosting.validate_token")
+    for _ in range(3):
+        assert hosting.get_existing_access_token()[0] == "ejJhfake_token"
+        assert hosting.authenticated_token() == "ejJhfake_token"
+    # The config file is read once per process
+    assert [
+        call.args[0]
+        for call in mock_file.call_args_list
+        if call.args[0] == constants.Hosting.HOSTING_JSON
+    ] == [constants.Hosting.HOSTING_JSON]
+
+
 def test_no_existing_access_token(mocker):
     # Config file does not have access token
     mock_hosting_config = {"code": "fake_code"}
@@ -61,13 +101,13 @@ def test_invalid_json_config_file(mocker):
 
 def test_validate_token_success(mocker):
     # Valid token passes without raising any exceptions
-    mocker.patch("httpx.post")
+    mocker.patch("httpx.Client.post")
     hosting.validate_token("fake_token")
 
 
 def test_invalid_token_access_denied(mocker):
     # Invalid token raises an exception
-    mocker.patch("httpx.post", return_value=httpx.Response(403))
+    mocker.patch("httpx.Client.post", return_value=httpx.Response(403))
     with pytest.raises(ValueError) as ex:
         hosting.validate_token("invalid_token")
         assert ex.value == "access denied"
@@ -75,7 +115,7 @@ def test_invalid_token_access_denied(mocker):
 
 def test_unable_to_validate_token(mocker):
     # Unable to validate token raises an exception, but not access denied
-    mocker.patch("httpx.post", return_value=httpx.Response(500))
+    mocker.patch("httpx.Client.post", return_value=httpx.Response(500))
     with pytest.raises(Exception):
         hosting.validate_token("invalid_token")
 
@@ -88,11 +128,21 @@ def test_delete_access_token_from_config(mocker):
     }
     mock_f = mock_open(read_data=json.dumps(config_json))
     mocker.patch("builtins.open", mock_f)
-    mocker.patch("os.path.exists", return_value=True)
+    mock_replace = mocker.patch("os.replace")
     mock_json_dump = mocker.patch("json.dump")
     hosting.delete_token_from_config()
     config_json.pop("access_token")
     assert mock_json_dump.call_args[0][0] == config_json
+    mock_replace.assert_called_once_with(
+        f"{constants.Hosting.HOSTING_JSON}.tmp", constants.Hosting.HOSTING_JSON
+    )
+
+
+def test_delete_access_token_without_config_file(mocker):
+    mocker.patch("builtins.open", side_effect=FileNotFoundError)
+    mock_json_dump = mocker.patch("json.dump")
+    hosting.delete_token_from_config()
+    assert mock_json_dump.call_count == 0
 
 
 def test_save_access_token_and_invitation_code_to_config(mocker):
@@ -132,6 +182,72 @@ def test_authenticated_token_success(mocker):
     assert hosting.authenticated_token() == access_token
 
 
+def test_authenticated_token_validated_recently(mocker):
+    access_token = "fake_token"
+    mocker.patch(
+        "reflex.utils.hosting.get_existing_access_token",
+        return_value=(access_token, "fake_code"),
+    )
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    assert hosting.authenticated_token() == access_token
+    assert hosting.authenticated_token() == access_token
+    assert mock_validate_token.call_count == 1
+
+    # Once invalidated, the token is validated with the server again
+    hosting.invalidate_token_cache()
+    assert hosting.authenticated_token() == access_token
+    assert mock_validate_token.call_count == 2
+
+
+def test_authenticated_token_validated_in_previous_invocation(mocker):
+    mocker.patch(
+        "reflex.utils.hosting.get_existing_access_token",
+        return_value=("fake_token", "fake_code"),
+    )
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    assert hosting.authenticated_token() == "fake_token"
+    with open(constants.Hosting.TOKEN_CACHE_JSON) as cache_file:
+        assert "fake_token" not in cache_file.read()
+
+    # A new process only has the token cache file
+    mocker.patch.object(hosting, "_validated_token", None)
+    assert hosting.authenticated_token() == "fake_token"
+    assert hosting.validate_token_with_retries("fake_token") is True
+    assert mock_validate_token.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "token_cache",
+    [
+        '{"token_hash": "abc", "valid_until": "soon"}',
+        '{"token_hash": 1, "valid_until": 1}',
+        '["not", "a", "dict"]',
+        "not json",
+    ],
+)
+def test_validate_token_with_retries_broken_token_cache(mocker, token_cache):
+    with open(constants.Hosting.TOKEN_CACHE_JSON, "w") as cache_file:
+        cache_file.write(token_cache)
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    # A broken cache entry is ignored, the token is validated with the server
+    assert hosting.validate_token_with_retries("fake_token") is True
+    assert mock_validate_token.call_count == 1
+
+
+def test_authenticated_token_expired_jwt(mocker):
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": 1}).encode()).decode()
+    access_token = f"header.{claims.rstrip('=')}.signature"
+    mocker.patch(
+        "reflex.utils.hosting.get_existing_access_token",
+        return_value=(access_token, "fake_code"),
+    )
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    assert hosting.authenticated_token() == access_token
+    assert hosting.authenticated_token() == access_token
+    # The token expired long ago, so it is never trusted without validating
+    assert mock_validate_token.call_count == 2
+
+
 def test_no_authenticated_token(mocker):
     mocker.patch(
         "reflex.utils.hosting.get_existing_access_token",
@@ -147,10 +263,72 @@ def test_maybe_authenticated_token_is_invalid(mocker):
     )
     mocker.patch("reflex.utils.hosting.validate_token", side_effect=ValueError)
     mocker.patch("builtins.open")
-    mocker.patch("json.load")
+    mocker.patch("os.replace")
+    mocker.patch(
+        "json.load", return_value={"access_token": "invalid_token", "code": "fake_code"}
+    )
     mock_json_dump = mocker.patch("json.dump")
     assert hosting.authenticated_token() is None
-    mock_json_dump.assert_called_once()
+    mock_json_dump.assert_called_once_with({"code": "fake_code"}, mocker.ANY)
+
+
+def test_authenticated_token_unable_to_validate(mocker):
+    # The token is kept when the server cannot be reached
+    mocker.patch(
+        "reflex.utils.hosting.get_existing_access_token",
+        return_value=("fake_token", "fake_code"),
+    )
+    mocker.patch("reflex.utils.hosting.validate_token", side_effect=Exception)
+    mock_delete_token = mocker.patch("reflex.utils.hosting.delete_token_from_config")
+    assert hosting.authenticated_token() is None
+    assert mock_delete_token.call_count == 0
+
+
+def test_authorization_header():
+    header = hosting.authorization_header("fake_token")
+    assert header == {"Authorization": "Bearer fake_token"}
+    assert hosting.authorization_header("fake_token") is header
+
+
+def test_authenticated_token_skip_validate(mocker):
+    mocker.patch(
+        "reflex.utils.hosting.get_existing_access_token",
+        return_value=("fake_token", "fake_code"),
+    )
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    assert hosting.authenticated_token(skip_validate=True) == "fake_token"
+    assert mock_validate_token.call_count == 0
+
+
+def test_token_rejected_by_server(mocker):
+    mocker.patch("reflex.utils.hosting.validate_token", side_effect=ValueError)
+    mock_delete_token = mocker.patch("reflex.utils.hosting.delete_token_from_config")
+    with pytest.raises(NotAuthenticatedError):
+        hosting.raise_if_token_rejected("fake_token", httpx.Response(403))
+    assert mock_delete_token.call_count == 1
+
+
+def test_token_not_rejected_by_server(mocker):
+    # The token is valid, the request was forbidden for another reason
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    mock_delete_token = mocker.patch("reflex.utils.hosting.delete_token_from_config")
+    hosting._remember_validated_token("fake_token")
+    hosting.raise_if_token_rejected("fake_token", httpx.Response(403))
+    hosting.raise_if_token_rejected("fake_token", httpx.Response(500))
+    assert mock_validate_token.call_count == 1
+    assert mock_delete_token.call_count == 0
+    # A forbidden request does not make the validated token untrusted
+    assert hosting._token_validated_recently("fake_token")
+
+
+def test_prepare_deploy_token_rejected(mocker):
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    mocker.patch("httpx.Client.post", return_value=httpx.Response(403))
+    mocker.patch("reflex.utils.hosting.validate_token", side_effect=ValueError)
+    mocker.patch("reflex.utils.hosting.delete_token_from_config")
+    with pytest.raises(NotAuthenticatedError) as ex:
+        hosting.prepare_deploy("fake-app")
+    assert str(ex.value) == "not authenticated"
 
 
 def test_prepare_deploy_not_authenticated(mocker):
@@ -162,7 +340,7 @@ def test_prepare_deploy_not_authenticated(mocker):
 
 def test_server_unable_to_prepare_deploy(mocker):
     mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
-    mocker.patch("httpx.post", return_value=httpx.Response(500))
+    mocker.patch("httpx.Client.post", return_value=httpx.Response(500))
     with pytest.raises(Exception):
         hosting.prepare_deploy("fake-app")
 
@@ -170,18 +348,20 @@ def test_server_unable_to_prepare_deploy(mocker):
 def test_prepare_deploy_success(mocker):
     mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
     mocker.patch(
-        "httpx.post",
+        "httpx.Client.post",
         return_value=Mock(
             status_code=200,
-            json=lambda: dict(
-                app_prefix="fake-app-prefix",
-                reply=dict(
-                    key="fake-key",
-                    api_url="fake-api-url",
-                    deploy_url="fake-deploy-url",
-                ),
-                suggestion=None,
-                existing=[],
+            content=json.dumps(
+                dict(
+                    app_prefix="fake-app-prefix",
+                    reply=dict(
+                        key="fake-key",
+                        api_url="fake-api-url",
+                        deploy_url="fake-deploy-url",
+                    ),
+                    suggestion=None,
+                    existing=[],
+                )
             ),
         ),
     )
@@ -191,13 +371,13 @@ def test_prepare_deploy_success(mocker):
 
 def test_deploy(mocker):
     mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
-    mocker.patch("builtins.open")
-    mocker.patch(
-        "httpx.post",
+    mock_open_file = mocker.patch("builtins.open")
+    mock_post = mocker.patch(
+        "httpx.Client.post",
         return_value=Mock(
             status_code=200,
-            json=lambda: dict(
-                frontend_url="https://fake-url", backend_url="https://fake-url"
+            content=json.dumps(
+                dict(frontend_url="https://fake-url", backend_url="https://fake-url")
             ),
         ),
     )
@@ -210,6 +390,190 @@ def test_deploy(mocker):
         regions=["fake-region"],
         app_prefix="fake-app-prefix",
     )
+    # Only the params which are set are sent
+    assert mock_post.call_args.kwargs["data"] == dict(
+        key="fake-key",
+        app_name="fake-app-name",
+        regions_json='["fake-region"]',
+        app_prefix="fake-app-prefix",
+        reflex_version=constants.Reflex.VERSION,
+    )
+    # The zip files are streamed from the open file objects
+    opened_file = mock_open_file.return_value.__enter__.return_value
+    assert mock_post.call_args.kwargs["files"] == [
+        ("files", ("fake-frontend-path", opened_file, "application/zip")),
+        ("files", ("fake-backend-path", opened_file, "application/zip")),
+    ]
+
+
+def test_list_deployments(mocker):
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    deployment = dict(
+        key="fake-key",
+        regions=["sjc"],
+        app_name="fake-app",
+        vm_type="fake-vm",
+        cpus=1,
+        memory_mb=1024,
+        url="https://fake-url",
+        envs=["FAKE_ENV"],
+    )
+    mocker.patch(
+        "httpx.Client.get",
+        return_value=Mock(
+            status_code=200,
+            content=json.dumps([dict(deployment, unknown_field="ignored")]),
+        ),
+    )
+    assert hosting.list_deployments() == [deployment]
+
+
+@pytest.mark.parametrize("key, found", [("fake-key-2", True), ("missing", False)])
+def test_get_deployment(mocker, key, found):
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    deployments = [
+        dict(
+            key=f"fake-key-{i}",
+            regions=["sjc"],
+            app_name="fake-app",
+            vm_type="fake-vm",
+            cpus=1,
+            memory_mb=1024,
+            url="https://fake-url",
+            envs=[],
+        )
+        for i in range(3)
+    ]
+    mocker.patch(
+        "httpx.Client.get",
+        return_value=Mock(status_code=200, content=json.dumps(deployments)),
+    )
+    assert hosting.get_deployment(key) == (deployments[2] if found else None)
+
+
+def test_list_deployments_unexpected_format(mocker):
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    mocker.patch(
+        "httpx.Client.get",
+        return_value=Mock(status_code=200, content=json.dumps([dict(key="fake-key")])),
+    )
+    with pytest.raises(Exception) as ex:
+        hosting.list_deployments()
+    assert str(ex.value) == "internal errors"
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        (httpx.ReadTimeout("timed out"), "request timeout"),
+        (httpx.ConnectError("refused"), "request error"),
+    ],
+)
+def test_delete_deployment_request_failure(mocker, error, message):
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    mocker.patch("httpx.Client.delete", side_effect=error)
+    with pytest.raises(Exception) as ex:
+        hosting.delete_deployment("fake-key")
+    assert str(ex.value) == message
+
+
+@pytest.mark.parametrize(
+    "key, valid",
+    [("my-site-1", True), ("my_site", False), ("my site", False), ("sïte", False)],
+)
+def test_deployments_post_param_key(key, valid):
+    params = dict(
+        key=key,
+        app_name="fake-app",
+        regions_json='["sjc"]',
+        app_prefix="fake-prefix",
+        reflex_version="0.0.0",
+    )
+    if valid:
+        assert hosting.DeploymentsPostParam(**params).key == key
+    else:
+        with pytest.raises(ValidationError):
+            hosting.DeploymentsPostParam(**params)
+
+
+@pytest.mark.parametrize(
+    "url, valid",
+    [
+        ("https://fake-url", True),
+        ("http://fake-url", True),
+        ("ftp://fake-url", False),
+        ("https:/", False),
+    ],
+)
+def test_deployment_post_response_urls(url, valid):
+    if valid:
+        assert (
+            hosting.DeploymentPostResponse(
+                frontend_url=url, backend_url=url
+            ).frontend_url
+            == url
+        )
+    else:
+        with pytest.raises(ValidationError):
+            hosting.DeploymentPostResponse(frontend_url=url, backend_url=url)
+
+
+def test_authenticate_on_browser_backoff(mocker):
+    mocker.patch("webbrowser.open", return_value=True)
+    mocker.patch(
+        "reflex.utils.hosting.fetch_token",
+        side_effect=[Exception] * 8 + [("fake_token", "fake_code")],
+    )
+    mock_sleep = mocker.patch("time.sleep")
+    mocker.patch("random.uniform", return_value=0)
+
+    assert hosting.authenticate_on_browser(None) == ("fake_token", "fake_code")
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 8
+    assert delays[0] == constants.Hosting.WEB_AUTH_INITIAL_SLEEP_DURATION
+    assert delays == sorted(delays)
+    assert delays[-1] == constants.Hosting.WEB_AUTH_SLEEP_DURATION
+
+
+def test_backoff_delay():
+    delays = [hosting._backoff_delay(attempt) for attempt in range(20)]
+    assert delays[0] < delays[2] < delays[4]
+    for delay in delays:
+        assert (
+            constants.Hosting.WEB_AUTH_INITIAL_SLEEP_DURATION
+            <= delay
+            <= constants.Hosting.WEB_AUTH_SLEEP_DURATION
+            + constants.Hosting.WEB_AUTH_BACKOFF_JITTER
+        )
+
+
+def test_log_out_on_browser_failed(mocker):
+    mocker.patch("webbrowser.open", return_value=False)
+    with pytest.raises(SystemExit):
+        hosting.log_out_on_browser()
+
+
+def test_log_out_on_browser_slow_to_open(mocker):
+    mocker.patch.object(constants.Hosting, "BROWSER_OPEN_TIMEOUT", 0.01)
+    opened_in_daemon = []
+
+    def slow_open(url):
+        opened_in_daemon.append(threading.current_thread().daemon)
+        time.sleep(0.2)
+        return False
+
+    mocker.patch("webbrowser.open", side_effect=slow_open)
+    # Still waiting for the browser, assume it opens
+    hosting.log_out_on_browser()
+    # The browser is opened in a daemon thread, so it does not block the exit
+    assert opened_in_daemon == [True]
+
+
+def test_validate_token_with_retries_first_attempt(mocker):
+    mocker.patch("reflex.utils.hosting.validate_token")
+    mock_status = mocker.patch("reflex.utils.console.status")
+    assert hosting.validate_token_with_retries("fake-token") is True
+    mock_status.assert_not_called()
 
 
 def test_validate_token_with_retries_failed(mocker):
@@ -217,10 +581,11 @@ def test_validate_token_with_retries_failed(mocker):
         "reflex.utils.hosting.validate_token", side_effect=Exception
     )
     mock_delete_token = mocker.patch("reflex.utils.hosting.delete_token_from_config")
-    mocker.patch("time.sleep")
+    mock_sleep = mocker.patch("time.sleep")
 
     assert hosting.validate_token_with_retries("fake-token") is False
     assert mock_validate_token.call_count == constants.Hosting.WEB_AUTH_RETRIES
+    assert mock_sleep.call_count == constants.Hosting.WEB_AUTH_RETRIES - 1
     assert mock_delete_token.call_count == 0
 
 
@@ -328,10 +693,47 @@ def test_interactive_get_deployment_key_user_input_accepted(mocker):
     ) == ("my-site", "url211", "url212")
 
 
+def test_interactive_get_deployment_key_rejected_input_not_retried(mocker):
+    mocker.patch("reflex.utils.console.ask", side_effect=["taken", "taken", "my-site"])
+    mock_prepare_deploy = mocker.patch(
+        "reflex.utils.hosting.prepare_deploy",
+        side_effect=[
+            hosting.DeploymentPrepareResponse(
+                app_prefix="fake-prefix",
+                reply=hosting.DeploymentPrepInfo(
+                    key="taken-1", api_url="url111", deploy_url="url112"
+                ),
+            ),
+            hosting.DeploymentPrepareResponse(
+                app_prefix="fake-prefix",
+                reply=hosting.DeploymentPrepInfo(
+                    key="my-site", api_url="url211", deploy_url="url212"
+                ),
+            ),
+        ],
+    )
+    assert hosting.interactive_get_deployment_key_from_user_input(
+        hosting.DeploymentPrepareResponse(
+            app_prefix="fake-prefix",
+            suggestion=hosting.DeploymentPrepInfo(
+                key="suggested", api_url="url011", deploy_url="url012"
+            ),
+        ),
+        "fake-app",
+    ) == ("my-site", "url211", "url212")
+    assert mock_prepare_deploy.call_count == 2
+
+
 def test_process_envs():
     assert hosting.process_envs(["a=b", "c=d"]) == {"a": "b", "c": "d"}
 
 
+@pytest.mark.parametrize("env", ["1a=b", "a-b=c", "=b", "a\n=b", "ä=b", "ab"])
+def test_process_envs_invalid(env):
+    with pytest.raises(SystemExit):
+        hosting.process_envs([env])
+
+
 @pytest.mark.parametrize(
     "inputs, expected",
     [
@@ -344,8 +746,233 @@ def test_process_envs():
         ([""], []),
         # enters one env with value, one without, then enter
         (["a", "b", "c", "", ""], ["a=b", "c="]),
+        # pastes the lines of a .env file, then enter
+        (["# comment", "a=b", "c=d=e", ""], ["a=b", "c=d=e"]),
+        # pastes .env lines with export and quoted values, then enter
+        (
+            ["export a=b", 'c="d e"', "f='g'", 'h="i', ""],
+            ["a=b", "c=d e", "f=g", 'h="i'],
+        ),
+        # pastes .env lines with indented comments and inline comments, then enter
+        (
+            ["  # db settings", "A=1", "B=2 # note", 'C="3 # kept" # note', ""],
+            ["A=1", "B=2", "C=3 # kept"],
+        ),
+        # pastes an indented env line, then a blank line to finish
+        (["  a=b  ", "   "], ["a=b"]),
+        # pastes one env line, enters another one by name and value, then enter
+        (["a=b", "c", "d", ""], ["a=b", "c=d"]),
     ],
 )
 def test_interactive_prompt_for_envs(mocker, inputs, expected):
     mocker.patch("reflex.utils.console.ask", side_effect=inputs)
     assert hosting.interactive_prompt_for_envs() == expected
+
+
+def test_poll_sites(mocker):
+    request = httpx.Request("GET", "https://fake-url")
+    mocker.patch(
+        "httpx.AsyncClient.get",
+        side_effect=[
+            httpx.Response(200, request=request),
+            httpx.Response(502, request=request),
+        ],
+    )
+    assert hosting.poll_sites(["https://fake-backend", "https://fake-frontend"]) == [
+        True,
+        False,
+    ]
+
+
+def test_status_and_poll(mocker):
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    mocker.patch(
+        "httpx.Client.get",
+        return_value=Mock(
+            status_code=200,
+            content=json.dumps(
+                dict(
+                    frontend=dict(
+                        url="https://fake-frontend", reachable=True, updated_at=None
+                    ),
+                    backend=dict(
+                        url="https://fake-backend", reachable=False, updated_at=None
+                    ),
+                )
+            ),
+        ),
+    )
+    request = httpx.Request("GET", "https://fake-url")
+    mock_poll = mocker.patch(
+        "httpx.AsyncClient.get",
+        side_effect=[
+            httpx.Response(200, request=request),
+            httpx.Response(502, request=request),
+        ],
+    )
+    status, frontend_up, backend_up = hosting.status_and_poll("fake-key")
+    assert status.frontend.frontend_url == "https://fake-frontend"
+    assert (frontend_up, backend_up) == (True, False)
+    assert [call.args[0] for call in mock_poll.call_args_list] == [
+        "https://fake-frontend",
+        "https://fake-backend/ping",
+    ]
+
+
+def test_convert_to_local_time():
+    local_time = hosting.convert_to_local_time("2023-09-01T10:00:00.123456+00:00")
+    assert datetime.fromisoformat(local_time) == datetime(
+        2023, 9, 1, 10, 0, 0, 123456, tzinfo=timezone.utc
+    )
+    assert local_time[10] == " "
+
+
+def test_convert_to_local_time_naive_timestamp_is_utc():
+    hosting._convert_to_local_time.cache_clear()
+    local_time = hosting.convert_to_local_time("2023-09-01T10:00:00")
+    assert datetime.fromisoformat(local_time) == datetime(
+        2023, 9, 1, 10, 0, 0, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.parametrize("timestamp", ["N/A", ["not", "hashable"], None])
+def test_convert_to_local_time_invalid_timestamp(timestamp):
+    assert hosting.convert_to_local_time(timestamp) == timestamp
+
+
+def test_convert_to_local_time_cached(mocker):
+    hosting._convert_to_local_time.cache_clear()
+    spy = mocker.spy(hosting.console, "debug")
+    assert hosting.convert_to_local_time("not-iso") == "not-iso"
+    assert hosting.convert_to_local_time("not-iso") == "not-iso"
+    # The second conversion is served from the cache
+    assert spy.call_count == 1
+
+
+@pytest.fixture
+def mock_logs_connect(mocker):
+    """Mock the websocket connection to the log server.
+
+    Args:
+        mocker: The pytest mocker.
+
+    Returns:
+        The mocked websockets.connect.
+    """
+    mocker.patch("reflex.utils.hosting.authenticated_token", return_value="fake_token")
+    return mocker.patch("websockets.connect")
+
+
+@pytest.mark.asyncio
+async def test_get_logs(mock_logs_connect, capsys):
+    mock_ws = mock_logs_connect.return_value.__aenter__.return_value
+    mock_ws.recv = AsyncMock(
+        side_effect=[
+            json.dumps({"timestamp": "not-iso-1", "message": "first"}),
+            json.dumps({}),
+            json.dumps({"timestamp": "not-iso-2", "message": "second"}),
+            Exception("disconnected"),
+        ]
+    )
+    await hosting.get_logs("fake-key")
+    assert mock_logs_connect.call_args.kwargs["compression"] is None
+    assert capsys.readouterr().out.startswith(
+        "not-iso-1 | first\nnot-iso-2 | second\nLog server disconnected"
+    )
+
+
+@pytest.mark.asyncio
+async def test_display_deploy_milestones(mock_logs_connect, mocker):
+    mock_print = mocker.patch("reflex.utils.console.print")
+    mock_ws = mock_logs_connect.return_value.__aenter__.return_value
+    mock_ws.recv = AsyncMock(
+        side_effect=[
+            json.dumps({"timestamp": "not-iso-1", "message": "building"}),
+            json.dumps({"timestamp": "not-iso-2", "message": "uploading"}),
+            json.dumps({"timestamp": "not-iso-3", "message": "deploy success"}),
+            json.dumps({"timestamp": "not-iso-4", "message": "not shown"}),
+        ]
+    )
+    from_time = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    await hosting.display_deploy_milestones("fake-key", from_time)
+    endpoint = mock_logs_connect.call_args.args[0]
+    assert parse_qs(endpoint.split("?", 1)[1]) == {
+        "access_token": ["fake_token"],
+        "log_type": [hosting.LogType.DEPLOY_LOG.value],
+        "from_iso_timestamp": [from_time.astimezone().isoformat()],
+    }
+    # The messages arrive together, so they are printed at once
+    mock_print.assert_called_once_with(
+        "not-iso-1 | building\nnot-iso-2 | uploading\nnot-iso-3 | deploy success"
+    )
+
+
+@pytest.mark.parametrize(
+    "message, end",
+    [("Deploy SUCCESS", True), ("app deploy failed: oom", True), ("deploying", False)],
+)
+def test_add_milestone_line_end_of_deployment(message, end):
+    lines = []
+    row = json.dumps({"timestamp": "not-iso", "message": message})
+    assert hosting._add_milestone_line(row, lines) is end
+    assert lines == [f"not-iso | {message}"]
+
+
+@pytest.mark.asyncio
+async def test_display_deploy_milestones_disconnected(mock_logs_connect, mocker):
+    mock_print = mocker.patch("reflex.utils.console.print")
+    mock_ws = mock_logs_connect.return_value.__aenter__.return_value
+    mock_ws.recv = AsyncMock(
+        side_effect=[
+            json.dumps({"timestamp": "not-iso-1", "message": "building"}),
+            Exception("disconnected"),
+        ]
+    )
+    await hosting.display_deploy_milestones("fake-key", datetime.now())
+    # The messages received before the connection is lost are still printed
+    mock_print.assert_called_once_with("not-iso-1 | building")
+
+
+@pytest.mark.asyncio
+async def test_get_logs_token_rejected(mock_logs_connect, mocker):
+    mock_logs_connect.return_value.__aenter__.side_effect = InvalidStatusCode(403, None)
+    mocker.patch("reflex.utils.hosting.validate_token", side_effect=ValueError)
+    mock_delete_token = mocker.patch("reflex.utils.hosting.delete_token_from_config")
+    with pytest.raises(NotAuthenticatedError):
+        await hosting.get_logs("fake-key")
+    mock_delete_token.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_logs_forbidden_with_valid_token(mock_logs_connect, mocker, capsys):
+    # The key is forbidden to the user, but the token is still valid
+    mock_logs_connect.return_value.__aenter__.side_effect = InvalidStatusCode(403, None)
+    mock_validate_token = mocker.patch("reflex.utils.hosting.validate_token")
+    mock_delete_token = mocker.patch("reflex.utils.hosting.delete_token_from_config")
+    await hosting.get_logs("fake-key")
+    mock_validate_token.assert_called_once_with("fake_token")
+    mock_delete_token.assert_not_called()
+    assert "Log server disconnected" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_get_logs_endpoint(mock_logs_connect):
+    mock_ws = mock_logs_connect.return_value.__aenter__.return_value
+    mock_ws.recv = AsyncMock(side_effect=Exception("disconnected"))
+    await hosting.get_logs(
+        "fake-key",
+        log_type=hosting.LogType.BUILD_LOG,
+        from_iso_timestamp=datetime(2023, 1, 1, tzinfo=timezone.utc),
+    )
+    hosting.authenticated_token.assert_called_once_with(skip_validate=True)
+    endpoint = mock_logs_connect.call_args.args[0]
+    assert endpoint.startswith(
+        f"{constants.Hosting.DEPLOYMENT_LOGS_ENDPOINT}/fake-key/logs?"
+    )
+    assert parse_qs(endpoint.split("?", 1)[1]) == {
+        "access_token": ["fake_token"],
+        "log_type": [hosting.LogType.BUILD_LOG.value],
+        "from_iso_timestamp": [
+            datetime(2023, 1, 1, tzinfo=timezone.utc).astimezone().isoformat()
+        ],
+    }